@@ -514,8 +514,25 @@ def insert_tagpack(args):
     print_info(msg)
 
 
-def _split_into_chunks(seq, size):
-    return (seq[pos : pos + size] for pos in range(0, len(seq), size))
+def _batch_by_currency(rows, size, include=lambda currency: True):
+    """Groups a stream of (address, currency) rows into per currency
+    DataFrames of at most size rows, without materializing the whole stream.
+    """
+    pending = {}
+    for address, currency in rows:
+        if currency not in pending:
+            pending[currency] = [] if include(currency) else None
+        batch = pending[currency]
+        if batch is None:
+            continue
+        batch.append((address, currency))
+        if len(batch) == size:
+            yield currency, pd.DataFrame(batch, columns=["address", "currency"])
+            pending[currency] = []
+
+    for currency, batch in pending.items():
+        if batch:
+            yield currency, pd.DataFrame(batch, columns=["address", "currency"])
 
 
 def insert_cluster_mapping_wp(currency, ks_mapping, args, batch):
@@ -572,9 +589,6 @@ def load_ks_mapping(args):
 def insert_cluster_mapping(args, batch_size=5_000):
     t0 = time.time()
     tagstore = TagStore(args.url, args.schema)
-    df = pd.DataFrame(
-        tagstore.get_addresses(args.update), columns=["address", "currency"]
-    )
     ks_mapping = load_ks_mapping(args)
     print("Importing with mapping config: ", ks_mapping)
     currencies = ks_mapping.keys()
@@ -582,11 +596,14 @@ def insert_cluster_mapping(args, batch_size=5_000):
 
     processed_currencies = []
 
-    workpackages = []
-    for currency, data in df.groupby("currency"):
-        if gs.contains_keyspace_mapping(currency):
-            for batch in _split_into_chunks(data, batch_size):
-                workpackages.append((currency, ks_mapping, args, batch))
+    workpackages = [
+        (currency, ks_mapping, args, batch)
+        for currency, batch in _batch_by_currency(
+            tagstore.get_addresses(args.update),
+            batch_size,
+            include=gs.contains_keyspace_mapping,
+        )
+    ]
 
     nr_workers = int(cpu_count() / 2)
     print(
@@ -1,16 +1,20 @@
 # -*- coding: utf-8 -*-
+import io
+import struct
 import textwrap
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from functools import wraps
-from typing import List
+from functools import lru_cache, wraps
+from typing import List, Set
 
 import numpy as np
+import pandas as pd
 from cashaddress.convert import to_legacy_address
 from psycopg2 import connect
 from psycopg2.errors import DeadlockDetected
 from psycopg2.extensions import AsIs, register_adapter
-from psycopg2.extras import execute_batch, execute_values
+from psycopg2.extras import execute_batch
 
 from tagpack import ValidationError
 from tagpack.cmd_utils import print_fail, print_info, print_success, print_warn
@@ -21,6 +25,14 @@ from .utils import open_localfile_with_pkgresource_fallback
 
 register_adapter(np.int64, AsIs)
 
+# supported currencies per (url, schema), saves a round trip per TagStore
+_CURRENCY_CACHE = {}
+
+
+def clear_currency_cache():
+    """Forget the cached currencies, e.g. after the currency enum changed."""
+    _CURRENCY_CACHE.clear()
+
 
 class InsertTagpackWorker:
     def __init__(
@@ -111,15 +123,18 @@ class TagStore(object):
     def __init__(self, url, schema):
         self.conn = connect(url, options=f"-c search_path={schema}")
         self.cursor = self.conn.cursor()
+        self.url = url
         self.schema = schema
 
-        if self.do_tagstore_tables_exist():
+        key = (url, schema)
+        if key not in _CURRENCY_CACHE and self.do_tagstore_tables_exist():
             self.cursor.execute("SELECT unnest(enum_range(NULL::currency))")
-            self.supported_currencies = [i[0] for i in self.cursor.fetchall()]
-        else:
-            self.supported_currencies = []
+            _CURRENCY_CACHE[key] = [i[0] for i in self.cursor]
+        self.supported_currencies = list(_CURRENCY_CACHE.get(key, []))
+        self._supported_currencies_set = frozenset(self.supported_currencies)
         self.existing_packs = None
         self.existing_actorpacks = None
+        self.prepared_statements = {}
 
     def does_tagstore_db_exist(self, db_name):
         self.cursor.execute(
@@ -152,11 +167,12 @@ class TagStore(object):
         ) as f:
             creation_sql = f.read()
             self.cursor.execute(creation_sql)
+        clear_currency_cache()
 
     @auto_commit
-    def insert_taxonomy(self, taxonomy):
+    def insert_taxonomy(self, taxonomy, batch=1000):
         if taxonomy.key == "confidence":
-            self.insert_confidence_scores(taxonomy)
+            self.insert_confidence_scores(taxonomy, batch)
             return
 
         statement = (
@@ -172,57 +188,53 @@ class TagStore(object):
             statement, {"id": taxonomy.key, "source": taxonomy.uri, "description": desc}
         )
 
-        statement = (
+        self._prepare(
+            "insert_concept",
             "INSERT INTO concept (id, label, taxonomy, source, description) "
-            "VALUES (%(id)s,%(label)s,%(taxonomy)s,%(source)s,%(description)s)"
+            "VALUES ($1, $2, $3, $4, $5) "
             "ON CONFLICT (id) DO UPDATE "
             "SET (label, taxonomy, source, description) = "
-            "(%(label)s,%(taxonomy)s,%(source)s,%(description)s);"
+            "(EXCLUDED.label, EXCLUDED.taxonomy, EXCLUDED.source, "
+            "EXCLUDED.description);",
+        )
+        execute_batch(
+            self.cursor,
+            "EXECUTE insert_concept (%s, %s, %s, %s, %s)",
+            [
+                (c.id, c.label, c.taxonomy.key, c.uri, c.description)
+                for c in taxonomy.concepts
+            ],
+            page_size=batch,
         )
-        for c in taxonomy.concepts:
-            v = {
-                "id": c.id,
-                "label": c.label,
-                "taxonomy": c.taxonomy.key,
-                "source": c.uri,
-                "description": c.description,
-            }
-            self.cursor.execute(statement, v)
 
     @auto_commit
-    def insert_confidence_scores(self, confidence):
-        statement = (
-            "INSERT INTO confidence (id, label, description, level)"
-            " VALUES (%(id)s,%(label)s,%(description)s,%(level)s)"
+    def insert_confidence_scores(self, confidence, batch=1000):
+        self._prepare(
+            "insert_confidence",
+            "INSERT INTO confidence (id, label, description, level) "
+            "VALUES ($1, $2, $3, $4) "
             "ON CONFLICT (id) DO UPDATE "
             "SET (label, description, level) = "
-            "(%(label)s,%(description)s,%(level)s);"
+            "(EXCLUDED.label, EXCLUDED.description, EXCLUDED.level);",
+        )
+        execute_batch(
+            self.cursor,
+            "EXECUTE insert_confidence (%s, %s, %s, %s)",
+            [(c.id, c.label, c.description, c.level) for c in confidence.concepts],
+            page_size=batch,
         )
-
-        for c in confidence.concepts:
-            self.cursor.execute(
-                statement,
-                {
-                    "id": c.id,
-                    "label": c.label,
-                    "description": c.description,
-                    "level": c.level,
-                },
-            )
 
     def tp_exists(self, prefix, rel_path):
-        if not self.existing_packs:
+        if self.existing_packs is None:
             self.existing_packs = self.get_ingested_tagpacks()
         return self.create_id(prefix, rel_path) in self.existing_packs
 
     def create_id(self, prefix, rel_path):
-        return ":".join([prefix, rel_path]) if prefix else rel_path
+        return f"{prefix}:{rel_path}" if prefix else rel_path
 
     @retry_on_deadlock(times=3)
     @auto_commit
-    def insert_tagpack(
-        self, tagpack, is_public, force_insert, prefix, rel_path, batch=1000
-    ):
+    def insert_tagpack(self, tagpack, is_public, force_insert, prefix, rel_path):
         tagpack_id = self.create_id(prefix, rel_path)
         h = _get_header(tagpack, tagpack_id)
 
@@ -243,71 +255,73 @@ class TagStore(object):
             is_public,
         )
         self.cursor.execute(q, v)
-        self.conn.commit()
 
-        addr_sql = "INSERT INTO address (currency, address) VALUES %s \
-            ON CONFLICT DO NOTHING"
-        tag_sql = "INSERT INTO tag (label, source, category, abuse, address, \
-            currency, is_cluster_definer, confidence, lastmod, \
-            context, tagpack, actor ) VALUES \
-            %s RETURNING id"
-
-        tag_concept_sql = "INSERT INTO tag_concept (tag_id, concept_id) VALUES %s \
-            ON CONFLICT DO NOTHING"
-
-        def insert_tags_batch(tag_data, tag_concepts, address_data):
-            execute_values(self.cursor, addr_sql, address_data, template="(%s, %s)")
-            new_ids = execute_values(
-                self.cursor,
-                tag_sql,
-                tag_data,
-                template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
-                fetch=True,
-                page_size=batch,
+        self._create_staging_table(
+            "stage_address", "currency currency, address VARCHAR"
+        )
+
+        default_lastmod = datetime.now().isoformat()
+        supported = [
+            f
+            for f in (t.all_fields for t in tagpack.get_unique_tags())
+            if f.get("currency") in self._supported_currencies_set
+        ]
+        addresses = _perform_address_modifications_vectorized(
+            [f.get("currency") for f in supported],
+            [f.get("address") for f in supported],
+        )
+        # COPY does not return the new tag ids, so they are reserved up front
+        # and concepts are linked to them directly.
+        tag_ids = []
+        if supported:
+            self.cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence('tag', 'id')) "
+                "FROM generate_series(1, %s)",
+                (len(supported),),
             )
+            tag_ids = [i[0] for i in self.cursor]
+        tag_data = [
+            (tag_id, *_get_tag(f, addr, tagpack_id, default_lastmod))
+            for tag_id, f, addr in zip(tag_ids, supported, addresses)
+        ]
+        # tag rows are (id, label, source, category, abuse, address, currency, ...)
+        address_data = [(t[6], t[5]) for t in tag_data]
+        tag_concepts = [
+            (tag_id, concept_id)
+            for tag_id, f in zip(tag_ids, supported)
+            for concept_id in dict.fromkeys(f.get("concepts", []))
+        ]
+
+        self._copy_rows("stage_address", "currency, address", address_data)
+        self.cursor.execute(
+            "INSERT INTO address (currency, address) "
+            "SELECT DISTINCT currency, address FROM stage_address "
+            "ON CONFLICT DO NOTHING"
+        )
 
-            assert len(tag_concepts) == len(new_ids)
-            tcd = []
-            for tag_id, concept_ids in zip(new_ids, tag_concepts):
-                for tc in concept_ids:
-                    tcd.append((tag_id, tc))
-            execute_values(self.cursor, tag_concept_sql, tcd, template="(%s, %s)")
-
-        tag_data = []
-        address_data = []
-        tag_concepts = []
-        for tag in tagpack.get_unique_tags():
-            if self._supports_currency(tag):
-                tag_data.append(_get_tag(tag, tagpack_id))
-                address_data.append(_get_currency_and_address(tag))
-                tag_concepts.append(_get_tag_concepts(tag))
-
-            if len(tag_data) > batch:
-                insert_tags_batch(tag_data, tag_concepts, address_data)
-                tag_data = []
-                address_data = []
-                tag_concepts = []
-
-        # insert remaining items
-        insert_tags_batch(tag_data, tag_concepts, address_data)
+        self._copy_rows(
+            "tag",
+            "id, label, source, category, abuse, address, currency, "
+            "is_cluster_definer, confidence, lastmod, context, tagpack, actor",
+            tag_data,
+        )
+        self._copy_rows("tag_concept", "tag_id, concept_id", tag_concepts)
 
     def actorpack_exists(self, prefix, actorpack_name):
-        if not self.existing_actorpacks:
+        if self.existing_actorpacks is None:
             self.existing_actorpacks = self.get_ingested_actorpacks()
         actorpack_id = self.create_actorpack_id(prefix, actorpack_name)
         return actorpack_id in self.existing_actorpacks
 
     def create_actorpack_id(self, prefix, actorpack_name):
-        return ":".join([prefix, actorpack_name]) if prefix else actorpack_name
+        return f"{prefix}:{actorpack_name}" if prefix else actorpack_name
 
-    def get_ingested_actorpacks(self) -> List:
+    def get_ingested_actorpacks(self) -> Set:
         self.cursor.execute("SELECT id from actorpack")
-        return [i[0] for i in self.cursor.fetchall()]
+        return {i[0] for i in self.cursor}
 
     @auto_commit
-    def insert_actorpack(
-        self, actorpack, is_public, force_insert, prefix, rel_path, batch=1000
-    ):
+    def insert_actorpack(self, actorpack, is_public, force_insert, prefix, rel_path):
         actorpack_id = self.create_actorpack_id(prefix, rel_path)
         h = _get_actor_header(actorpack, actorpack_id)
 
@@ -334,50 +348,54 @@ class TagStore(object):
             "uri": actorpack.uri,
         }
         self.cursor.execute(q, v)
-        self.conn.commit()
 
-        actor_sql = (
-            "INSERT INTO actor (id, label, context, uri, lastmod, actorpack) "
-            "VALUES (%(id)s,%(label)s,%(context)s,%(uri)s,%(lastmod)s,%(actorpack)s) "
-            "ON CONFLICT (id) DO UPDATE "
-            "SET (label, context, uri, lastmod, actorpack) = "
-            "(%(label)s,%(context)s,%(uri)s,%(lastmod)s,%(actorpack)s);"
+        self._create_staging_table("stage_actor", "LIKE actor")
+        self._create_staging_table(
+            "stage_actor_categories", "actor_id VARCHAR, category_id VARCHAR"
         )
-
-        act_cat_sql = (
-            "INSERT INTO actor_categories (actor_id, category_id) "
-            "VALUES (%(actor_id)s, %(category_id)s) "
-            "ON CONFLICT (actor_id, category_id) DO NOTHING;"
-        )
-        act_jur_sql = (
-            "INSERT INTO actor_jurisdictions (actor_id, country_id) "
-            "VALUES (%(actor_id)s, %(country_id)s) "
-            "ON CONFLICT (actor_id, country_id) DO NOTHING;"
+        self._create_staging_table(
+            "stage_actor_jurisdictions", "actor_id VARCHAR, country_id VARCHAR"
         )
 
-        actor_data = []
+        default_lastmod = datetime.now().isoformat()
+        actor_data = {}
         cat_data = []
         jur_data = []
         for actor in actorpack.get_unique_actors():
-            actor_data.append(_get_actor(actor, actorpack_id))
+            a = _get_actor(actor, actorpack_id, default_lastmod)
+            # A single upsert must not touch the same row twice,
+            # keep the last occurrence per id (as sequential inserts would).
+            actor_data[a[0]] = a
             cat_data.extend(_get_actor_categories(actor))
             jur_data.extend(_get_actor_jurisdictions(actor))
 
-            # Handle writes in batches.
-            if len(actor_data) > batch:
-                execute_batch(self.cursor, actor_sql, actor_data)
-                execute_batch(self.cursor, act_cat_sql, cat_data)
-                execute_batch(self.cursor, act_jur_sql, jur_data)
-
-                actor_data = []
-                cat_data = []
-                jur_data = []
+        self._copy_rows(
+            "stage_actor",
+            "id, label, context, uri, lastmod, actorpack",
+            actor_data.values(),
+        )
+        self._copy_rows("stage_actor_categories", "actor_id, category_id", cat_data)
+        self._copy_rows("stage_actor_jurisdictions", "actor_id, country_id", jur_data)
 
-        # insert remaining items (needed if written in batch and len(unique actors)
-        # is not divisible by batch size)
-        execute_batch(self.cursor, actor_sql, actor_data)
-        execute_batch(self.cursor, act_cat_sql, cat_data)
-        execute_batch(self.cursor, act_jur_sql, jur_data)
+        # one statement for all three tables, the foreign keys of the
+        # categories and jurisdictions are checked at its end
+        self.cursor.execute(
+            "WITH ins_actor AS ("
+            "  INSERT INTO actor (id, label, context, uri, lastmod, actorpack) "
+            "  SELECT id, label, context, uri, lastmod, actorpack FROM stage_actor "
+            "  ON CONFLICT (id) DO UPDATE "
+            "  SET (label, context, uri, lastmod, actorpack) = "
+            "  (EXCLUDED.label, EXCLUDED.context, EXCLUDED.uri, "
+            "  EXCLUDED.lastmod, EXCLUDED.actorpack)"
+            "), ins_categories AS ("
+            "  INSERT INTO actor_categories (actor_id, category_id) "
+            "  SELECT actor_id, category_id FROM stage_actor_categories "
+            "  ON CONFLICT (actor_id, category_id) DO NOTHING"
+            ") "
+            "INSERT INTO actor_jurisdictions (actor_id, country_id) "
+            "SELECT actor_id, country_id FROM stage_actor_jurisdictions "
+            "ON CONFLICT (actor_id, country_id) DO NOTHING;"
+        )
 
     def find_actors_for(
         self,
@@ -564,7 +582,6 @@ class TagStore(object):
         tags for each address.
         """
         validate_currency(currency)
-        currency = currency if currency else "%"
         category = category if category else "%"
 
         msg = "Threshold must be a float number between 0 and 1"
@@ -575,89 +592,88 @@ class TagStore(object):
         except ValueError:
             raise ValidationError(msg)
 
-        q = "SELECT j.currency, j.address, array_agg(j.label) labels \
-            FROM ( \
-                SELECT q.currency, q.address, t.label \
-                FROM address_quality q, tag t \
-                WHERE t.category ILIKE %s \
-                    AND t.address=q.address \
-                    AND q.currency::text LIKE %s \
-                    AND q.quality <= %s \
-            ) as j \
-            GROUP BY j.currency, j.address"
+        params = {"category": category, "th": th}
+        currency_filter = ""
+        if currency:
+            currency_filter = "AND q.currency = %(currency)s"
+            params["currency"] = currency.upper()
 
-        self.cursor.execute(
-            q,
-            (
-                category,
-                currency,
-                th,
-            ),
+        q = (
+            "SELECT j.currency, j.address, array_agg(j.label) labels "
+            "FROM ( "
+            "    SELECT q.currency, q.address, t.label "
+            "    FROM address_quality q, tag t "
+            "    WHERE t.category ILIKE %(category)s "
+            "        AND t.address=q.address "
+            f"        {currency_filter} "
+            "        AND q.quality <= %(th)s "
+            ") as j "
+            "GROUP BY j.currency, j.address"
         )
 
-        return {(row[0], row[1]): row[2] for row in self.cursor.fetchall()}
+        self.cursor.execute(q, params)
+
+        return {(row[0], row[1]): row[2] for row in self.cursor}
 
     def remove_duplicates(self):
         self.cursor.execute(
             """
+            WITH dups AS (
+                SELECT
+                    t.id,
+                    ROW_NUMBER() OVER (PARTITION BY t.address,
+                        t.label,
+                        t.source,
+                        t.actor,
+                        t.is_cluster_definer,
+                        t.category,
+                        t.currency,
+                        t.confidence,
+                        t.abuse,
+                        tp.creator ORDER BY t.id DESC)
+                            AS duplicate_count
+                FROM tag t
+                JOIN tagpack tp ON t.tagpack = tp.id
+            )
             DELETE
                 FROM tag
-                WHERE id IN
-                (
-                    SELECT id FROM
-                        (SELECT
-                            t.id,
-                            t.address,
-                            t.label,
-                            t.source,
-                            t.actor,
-                            t.is_cluster_definer,
-                            t.category,
-                            t.currency,
-                            t.confidence,
-                            t.abuse,
-                            tp.creator,
-                            ROW_NUMBER() OVER (PARTITION BY t.address,
-                                t.label,
-                                t.source,
-                                t.actor,
-                                t.is_cluster_definer,
-                                t.category,
-                                t.currency,
-                                t.confidence,
-                                t.abuse,
-                                tp.creator ORDER BY t.id DESC)
-                                    AS duplicate_count
-                        FROM
-                            tag t,
-                            tagpack tp
-                        WHERE
-                            t.tagpack = tp.id) as x
-                    WHERE duplicate_count > 1
-                )
+                WHERE id IN (SELECT id FROM dups WHERE duplicate_count > 1)
             """
         )
         self.conn.commit()
         return self.cursor.rowcount
 
-    @auto_commit
     def refresh_db(self):
-        self.cursor.execute("REFRESH MATERIALIZED VIEW label")
-        self.cursor.execute("REFRESH MATERIALIZED VIEW statistics")
-        self.cursor.execute("REFRESH MATERIALIZED VIEW tag_count_by_cluster")
-        self.cursor.execute(
-            "REFRESH MATERIALIZED VIEW "
-            "cluster_defining_tags_by_frequency_and_maxconfidence"
-        )  # noqa
-
-    def get_addresses(self, update_existing):
-        if update_existing:
-            self.cursor.execute("SELECT address, currency FROM address")
-        else:
-            q = "SELECT address, currency FROM address WHERE NOT is_mapped"
-            self.cursor.execute(q)
-        for record in self.cursor:
-            yield record
+        views = [
+            "label",
+            "statistics",
+            "tag_count_by_cluster",
+            "cluster_defining_tags_by_frequency_and_maxconfidence",
+        ]
+        # the views do not depend on each other, refresh them side by side
+        with ThreadPoolExecutor(max_workers=len(views)) as executor:
+            futures = [executor.submit(self._refresh_view, v) for v in views]
+            for future in as_completed(futures):
+                future.result()
+
+    def _refresh_view(self, view):
+        conn = connect(self.url, options=f"-c search_path={self.schema}")
+        try:
+            with conn, conn.cursor() as cursor:
+                cursor.execute(f"REFRESH MATERIALIZED VIEW {view}")
+        finally:
+            conn.close()
+
+    def get_addresses(self, update_existing, itersize=10_000):
+        # named cursors are server-side, rows are fetched in chunks of itersize
+        with self.conn.cursor(name="address_stream") as cursor:
+            cursor.itersize = itersize
+            if update_existing:
+                cursor.execute("SELECT address, currency FROM address")
+            else:
+                q = "SELECT address, currency FROM address WHERE NOT is_mapped"
+                cursor.execute(q)
+            yield from cursor
 
     def get_tagstore_composition(self, by_currency=False):
         if by_currency:
@@ -688,13 +704,6 @@ class TagStore(object):
     @auto_commit
     def insert_cluster_mappings(self, clusters):
         if not clusters.empty:
-            q = "INSERT INTO address_cluster_mapping (address, currency, \
-                gs_cluster_id , gs_cluster_def_addr , gs_cluster_no_addr) \
-                VALUES (%s, %s, %s, %s, %s) ON CONFLICT (currency, address) \
-                DO UPDATE SET gs_cluster_id = EXCLUDED.gs_cluster_id, \
-                gs_cluster_def_addr = EXCLUDED.gs_cluster_def_addr, \
-                gs_cluster_no_addr = EXCLUDED.gs_cluster_no_addr"
-
             cols = [
                 "address",
                 "currency",
@@ -702,12 +711,57 @@ class TagStore(object):
                 "cluster_defining_address",
                 "no_addresses",
             ]
-            data = clusters[cols].to_records(index=False)
+            # left joins may have turned the id columns into floats
+            data = (
+                clusters[cols]
+                .astype({"cluster_id": "Int64", "no_addresses": "Int64"})
+                .drop_duplicates(subset=["currency", "address"], keep="last")
+            )
+            records = data.astype(object).where(data.notna(), None)
+
+            self._create_staging_table(
+                "stage_address_cluster_mapping",
+                "LIKE address_cluster_mapping INCLUDING DEFAULTS",
+            )
+            # binary COPY, the integer columns are sent without text conversion
+            buf = _to_binary_copy_buffer(
+                records.itertuples(index=False, name=None),
+                [_binary_text, _binary_text, _binary_int4, _binary_text, _binary_int4],
+            )
+            self.cursor.copy_expert(
+                "COPY stage_address_cluster_mapping (address, currency, "
+                "gs_cluster_id, gs_cluster_def_addr, gs_cluster_no_addr) "
+                "FROM STDIN WITH (FORMAT BINARY)",
+                buf,
+            )
+            self.cursor.execute(
+                "INSERT INTO address_cluster_mapping (address, currency, "
+                "gs_cluster_id, gs_cluster_def_addr, gs_cluster_no_addr) "
+                "SELECT address, currency, gs_cluster_id, gs_cluster_def_addr, "
+                "gs_cluster_no_addr FROM stage_address_cluster_mapping "
+                "ON CONFLICT (currency, address) "
+                "DO UPDATE SET gs_cluster_id = EXCLUDED.gs_cluster_id, "
+                "gs_cluster_def_addr = EXCLUDED.gs_cluster_def_addr, "
+                "gs_cluster_no_addr = EXCLUDED.gs_cluster_no_addr"
+            )
+
+    def _prepare(self, name, statement):
+        """
+        Creates a server-side prepared statement once per connection, later
+        calls with the same name reuse it via EXECUTE.
+        """
+        if name not in self.prepared_statements:
+            self.cursor.execute(f"PREPARE {name} AS {statement}")
+            self.prepared_statements[name] = statement
 
-            execute_batch(self.cursor, q, data)
+    def _create_staging_table(self, name, columns):
+        self.cursor.execute(f"CREATE TEMP TABLE {name} ({columns}) ON COMMIT DROP")
 
-    def _supports_currency(self, tag):
-        return tag.all_fields.get("currency") in self.supported_currencies
+    def _copy_rows(self, table, columns, rows):
+        self.cursor.copy_expert(
+            f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT CSV)",
+            _to_csv_buffer(rows),
+        )
 
     @auto_commit
     def finish_mappings_update(self, keys):
@@ -715,9 +769,9 @@ class TagStore(object):
                 AND currency IN %s"
         self.cursor.execute(q, (tuple(keys),))
 
-    def get_ingested_tagpacks(self) -> List:
+    def get_ingested_tagpacks(self) -> Set:
         self.cursor.execute("SELECT id from tagpack")
-        return [i[0] for i in self.cursor.fetchall()]
+        return {i[0] for i in self.cursor}
 
     def get_tags_count(self, currency="") -> int:
         validate_currency(currency)
@@ -971,49 +1025,47 @@ def validate_currency(currency):
         raise ValidationError(f"Currency not supported: {currency}")
 
 
-def _get_tag_concepts(tag):
-    return tag.all_fields.get("concepts", [])
-
-
-def _get_tag(tag, tagpack_id):
-    label = tag.all_fields.get("label").lower().strip()
-    lastmod = tag.all_fields.get("lastmod", datetime.now().isoformat())
-
-    _, address = _get_currency_and_address(tag)
+def _get_tag(f, address, tagpack_id, default_lastmod):
+    label = f.get("label").lower().strip()
+    lastmod = f.get("lastmod") or default_lastmod
 
     return (
         label,
-        tag.all_fields.get("source"),
-        tag.all_fields.get("category", None),
-        tag.all_fields.get("abuse", None),
+        f.get("source"),
+        f.get("category", None),
+        f.get("abuse", None),
         address,
-        tag.all_fields.get("currency"),
-        tag.all_fields.get("is_cluster_definer"),
-        tag.all_fields.get("confidence"),
+        f.get("currency"),
+        f.get("is_cluster_definer"),
+        f.get("confidence"),
         lastmod,
-        tag.all_fields.get("context"),
+        f.get("context"),
         tagpack_id,
-        tag.all_fields.get("actor", None),
+        f.get("actor", None),
     )
 
 
-def _perform_address_modifications(address, curr):
-    if "BCH" == curr.upper() and address.startswith("bitcoincash"):
-        address = to_legacy_address(address)
-
-    elif "ETH" == curr.upper():
-        address = address.lower()
+@lru_cache(maxsize=2**16)
+def _bch_to_legacy(address):
+    # the conversion is costly and tagpacks often repeat the same address
+    return to_legacy_address(address)
 
-    return address
 
+def _perform_address_modifications_vectorized(currencies, addresses):
+    """
+    Normalizes whole columns of addresses at once: BCH cash addresses are
+    converted to legacy format and ETH addresses are lower-cased.
+    """
+    df = pd.DataFrame({"currency": currencies, "address": addresses}, dtype=object)
+    curr = df["currency"].str.upper()
 
-def _get_currency_and_address(tag):
-    curr = tag.all_fields.get("currency")
-    addr = tag.all_fields.get("address")
+    eth = curr == "ETH"
+    df.loc[eth, "address"] = df.loc[eth, "address"].map(str.lower)
 
-    addr = _perform_address_modifications(addr, curr)
+    bch = (curr == "BCH") & df["address"].str.startswith("bitcoincash", na=False)
+    df.loc[bch, "address"] = df.loc[bch, "address"].map(_bch_to_legacy)
 
-    return curr, addr
+    return df["address"].tolist()
 
 
 def _get_header(tagpack, tid):
@@ -1036,31 +1088,71 @@ def _get_actor_header(actorpack, id):
     }
 
 
-def _get_actor(actor, actorpack_id):
-    uri = actor.all_fields.get("uri", None)
-    context = actor.all_fields.get("context", None)
-    return {
-        "id": actor.all_fields.get("id"),
-        "label": actor.all_fields.get("label", "").strip(),
-        "context": context.strip() if context is not None else context,
-        "uri": uri.strip() if uri is not None else uri,
-        "lastmod": actor.all_fields.get("lastmod", datetime.now().isoformat()),
-        "actorpack": actorpack_id,
-    }
+def _get_actor(actor, actorpack_id, default_lastmod):
+    f = actor.all_fields
+    uri = f.get("uri", None)
+    context = f.get("context", None)
+    return (
+        f.get("id"),
+        f.get("label", "").strip(),
+        context.strip() if context is not None else context,
+        uri.strip() if uri is not None else uri,
+        f.get("lastmod") or default_lastmod,
+        actorpack_id,
+    )
 
 
 def _get_actor_categories(actor):
-    data = []
-    actor_id = actor.all_fields.get("id")
-    for category in actor.all_fields.get("categories"):
-        data.append({"actor_id": actor_id, "category_id": category})
-    return data
+    f = actor.all_fields
+    actor_id = f.get("id")
+    return [(actor_id, category) for category in f.get("categories")]
 
 
 def _get_actor_jurisdictions(actor):
-    data = []
-    actor_id = actor.all_fields.get("id")
-    if "jurisdictions" in actor.all_fields:
-        for country in actor.all_fields.get("jurisdictions"):
-            data.append({"actor_id": actor_id, "country_id": country})
-    return data
+    f = actor.all_fields
+    actor_id = f.get("id")
+    return [(actor_id, country) for country in f.get("jurisdictions", [])]
+
+
+def _csv_value(value):
+    # COPY reads unquoted empty fields as NULL and quoted ones as empty strings
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _to_csv_buffer(rows):
+    buf = io.StringIO()
+    for row in rows:
+        buf.write(",".join(_csv_value(v) for v in row))
+        buf.write("\n")
+    buf.seek(0)
+    return buf
+
+
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+
+
+def _binary_text(value):
+    # text, varchar and enum values are all sent as their utf-8 text
+    data = str(value).encode("utf-8")
+    return struct.pack("!i", len(data)) + data
+
+
+def _binary_int4(value):
+    return struct.pack("!ii", 4, value)
+
+
+def _to_binary_copy_buffer(rows, encoders):
+    # PostgreSQL binary COPY format, NULLs are written as a field length of -1
+    buf = io.BytesIO()
+    buf.write(_PGCOPY_HEADER)
+    field_count = struct.pack("!h", len(encoders))
+    null = struct.pack("!i", -1)
+    for row in rows:
+        buf.write(field_count)
+        for encode, value in zip(encoders, row):
+            buf.write(null if value is None else encode(value))
+    buf.write(struct.pack("!h", -1))
+    buf.seek(0)
+    return buf
@@ -1,6 +1,6 @@
 import pytest
 
-from tagpack.cli import _load_taxonomies
+from tagpack.cli import _batch_by_currency, _load_taxonomies
 
 TAXONOMY_URL = "https://graphsense.github.io"
 
@@ -45,3 +45,12 @@ def test_load_offline_taxonomies_yaml(all_offline_tax_config):
     assert len(data["abuse"].concept_ids) == 13
     assert len(data["confidence"].concept_ids) == 14
     assert len(data["country"].concept_ids) == 249
+
+
+def test_batch_by_currency():
+    rows = [("a1", "BTC"), ("e1", "ETH"), ("a2", "BTC"), ("x1", "XYZ"), ("a3", "BTC")]
+
+    batches = _batch_by_currency(rows, 2, include=lambda c: c != "XYZ")
+    result = [(c, b["address"].tolist()) for c, b in batches]
+
+    assert result == [("BTC", ["a1", "a2"]), ("BTC", ["a3"]), ("ETH", ["e1"])]
@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
 
-from tagpack.tagstore import _perform_address_modifications
+from tagpack.tagstore import (
+    _binary_int4,
+    _binary_text,
+    _perform_address_modifications_vectorized,
+    _to_binary_copy_buffer,
+    _to_csv_buffer,
+)
 
 
 def test_bch_conversion():
@@ -8,15 +14,58 @@ def test_bch_conversion():
 
     # as per https://bch.btc.com/tools/address-converter
     expected = "3NFvYKuZrxTDJxgqqJSfouNHjT1dAG1Fta"
-    result = _perform_address_modifications(cashaddr, "BCH")
+    result = _perform_address_modifications_vectorized(["BCH"], [cashaddr])
 
-    assert expected == result
+    assert [expected] == result
 
 
 def test_eth_conversion():
     checksumaddr = "0xC61b9BB3A7a0767E3179713f3A5c7a9aeDCE193C"
 
     expected = "0xc61b9bb3a7a0767e3179713f3a5c7a9aedce193c"
-    result = _perform_address_modifications(checksumaddr, "ETH")
+    result = _perform_address_modifications_vectorized(["ETH"], [checksumaddr])
+
+    assert [expected] == result
+
+
+def test_vectorized_address_modifications():
+    currencies = ["BCH", "ETH", "BTC", "BCH"]
+    addresses = [
+        "bitcoincash:prseh0a4aejjcewhc665wjqhppgwrz2lw5txgn666a",
+        "0xC61b9BB3A7a0767E3179713f3A5c7a9aeDCE193C",
+        "1AbCdef",
+        "3NFvYKuZrxTDJxgqqJSfouNHjT1dAG1Fta",
+    ]
+
+    expected = [
+        "3NFvYKuZrxTDJxgqqJSfouNHjT1dAG1Fta",
+        "0xc61b9bb3a7a0767e3179713f3a5c7a9aedce193c",
+        "1AbCdef",
+        "3NFvYKuZrxTDJxgqqJSfouNHjT1dAG1Fta",
+    ]
+    result = _perform_address_modifications_vectorized(currencies, addresses)
+
+    assert expected == result
+
+
+def test_csv_buffer_quoting():
+    rows = [('a "b", c', None, "", True, "multi\nline")]
+
+    expected = '"a ""b"", c",,"","True","multi\nline"\n'
+    result = _to_csv_buffer(rows).read()
+
+    assert expected == result
+
+
+def test_binary_copy_buffer():
+    rows = [("ab", 7), ("ü", None)]
+
+    expected = (
+        b"PGCOPY\n\xff\r\n\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+        b"\x00\x02\x00\x00\x00\x02ab\x00\x00\x00\x04\x00\x00\x00\x07"
+        b"\x00\x02\x00\x00\x00\x02\xc3\xbc\xff\xff\xff\xff"
+        b"\xff\xff"
+    )
+    result = _to_binary_copy_buffer(rows, [_binary_text, _binary_int4]).read()
 
     assert expected == result